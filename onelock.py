@@ -2,12 +2,19 @@ import sys
 import os
 import shutil
 import logging
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, 
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                             QLineEdit, QPushButton, QFileDialog, QDialog, QListWidget, QListWidgetItem, QMessageBox, QSplashScreen, QCheckBox)
-from PyQt5.QtCore import Qt, QTimer, QEasingCurve, QPropertyAnimation, QEvent
+from PyQt5.QtCore import Qt, QTimer, QEasingCurve, QPropertyAnimation, QEvent, QThread, pyqtSignal
 from PyQt5.QtGui import QIcon, QPixmap, QFont
 import pickle
 import ctypes
+import tarfile
+import io
+import json
+import time
+import argparse
+import getpass
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Resource path function for PyInstaller
 def resource_path(relative_path):
@@ -24,10 +31,16 @@ print(sys.executable)
 PIN_FILE = os.path.join(DATA_DIR, "pin.pkl")
 PROTECTED_FILES_DB = os.path.join(DATA_DIR, "protected_files.pkl")
 PROTECTED_DIR = os.path.join(DATA_DIR, ".protected_files")
-WINDOW_SIZE = (780, 500)
+WINDOW_SIZE = (780, 560)
 LOG_FILE = os.path.join(DATA_DIR, "onelock.log")
 SPLASH_DURATION = 2000
 SPLASH_SIZE = (400, 250)
+EXPORT_MARKER_FILE = os.path.join(DATA_DIR, "export_marker.pkl")
+EXPORT_VAULT_DIR = ".protected_files"
+EXPORT_DB_NAME = "protected_files.json"
+EXPORT_CHUNK_SIZE = 1024 * 1024
+IMPORT_WORKERS = 4
+IMPORT_STAGING_DIR = ".import_staging"
 
 # Ensure DATA_DIR exists before logging
 if not os.path.exists(DATA_DIR):
@@ -40,6 +53,344 @@ logging.basicConfig(filename=LOG_FILE, level=logging.INFO,
 # Log startup
 logging.info("Starting OneLock application")
 
+def ensure_protected_dir():
+    if not os.path.exists(PROTECTED_DIR):
+        os.makedirs(PROTECTED_DIR)
+        ctypes.windll.kernel32.SetFileAttributesW(PROTECTED_DIR, 2)
+
+def load_export_marker():
+    try:
+        if os.path.exists(EXPORT_MARKER_FILE):
+            with open(EXPORT_MARKER_FILE, "rb") as f:
+                return pickle.load(f)
+    except Exception as e:
+        logging.error(f"Error loading export marker: {e}")
+    return {}
+
+def save_export_marker(snapshot):
+    try:
+        with open(EXPORT_MARKER_FILE, "wb") as f:
+            pickle.dump(snapshot, f)
+    except Exception as e:
+        logging.error(f"Error saving export marker: {e}")
+
+def is_vault_member(name):
+    parts = name.split("/")
+    return (len(parts) == 2 and parts[0] == EXPORT_VAULT_DIR
+            and parts[1] not in ("", ".", "..") and "\\" not in parts[1])
+
+def backup_file_name(incremental):
+    kind = "_incr" if incremental else ""
+    return f"onelock_backup_{time.strftime('%Y%m%d-%H%M%S')}{kind}.tar"
+
+def export_vault_archive(path, protected_files, incremental=False, progress=None):
+    """Stream the locked files list and vault contents into a tar archive at path.
+
+    If path is a directory, a timestamped archive is created inside it. The archive is
+    written to path + ".part" and only renamed into place once it is complete, so a
+    failed export never replaces an older backup.
+    Returns (archive path, number of vault files written).
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, backup_file_name(incremental))
+    if incremental and os.path.exists(path):
+        # Replacing an earlier archive would drop the files only that archive holds
+        raise FileExistsError(f"{path} already exists. Incremental backups need a new file name.")
+
+    marker = load_export_marker() if incremental else {}
+    snapshot = {}
+    archive_files = {}
+    for placeholder_path, protected_path in protected_files.items():
+        if not os.path.exists(protected_path):
+            continue
+        stat = os.stat(protected_path)
+        snapshot[protected_path] = (stat.st_size, stat.st_mtime_ns)
+        archive_files[placeholder_path] = {"file": EXPORT_VAULT_DIR + "/" + os.path.basename(protected_path),
+                                           "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    vault_paths = list(snapshot)
+
+    mode = "w|" if path.lower().endswith(".tar") else "w|gz"
+    part_path = path + ".part"
+    exported_count = 0
+    try:
+        # Stream mode writes the archive in a single sequential pass
+        with tarfile.open(part_path, mode, bufsize=EXPORT_CHUNK_SIZE) as tar:
+            db_data = json.dumps(archive_files).encode("utf-8")
+            db_info = tarfile.TarInfo(EXPORT_DB_NAME)
+            db_info.size = len(db_data)
+            db_info.mtime = int(time.time())
+            tar.addfile(db_info, io.BytesIO(db_data))
+            for index, protected_path in enumerate(vault_paths, 1):
+                if marker.get(protected_path) == snapshot[protected_path]:
+                    continue
+                if progress:
+                    progress(f"Exporting {index}/{len(vault_paths)}: {os.path.basename(protected_path)}")
+                tar.add(protected_path, arcname=EXPORT_VAULT_DIR + "/" + os.path.basename(protected_path),
+                        recursive=False)
+                exported_count += 1
+        os.replace(part_path, path)
+    except Exception:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    save_export_marker(snapshot)
+    return path, exported_count
+
+def open_backup_archive(path):
+    # Uncompressed archives can be restored in parallel by seeking to each entry;
+    # compressed archives have to be decompressed front to back.
+    try:
+        return tarfile.open(path, "r:"), False
+    except tarfile.ReadError:
+        return tarfile.open(path, "r:*"), True
+
+def read_backup_mapping(tar):
+    member = tar.next()
+    if member is None or member.name != EXPORT_DB_NAME or not member.isfile():
+        raise ValueError("this is not a OneLock backup")
+    try:
+        mapping = json.loads(tar.extractfile(member).read().decode("utf-8"))
+    except ValueError:
+        raise ValueError("the backup's locked files list is damaged")
+    if not isinstance(mapping, dict):
+        raise ValueError("the backup's locked files list is damaged")
+    for placeholder_path, entry in mapping.items():
+        if (not isinstance(entry, dict) or not isinstance(entry.get("file"), str)
+                or not is_vault_member(entry["file"])
+                or not isinstance(entry.get("size"), int) or not isinstance(entry.get("mtime_ns"), int)
+                or not os.path.isabs(placeholder_path) or not placeholder_path.endswith(".locked")):
+            raise ValueError(f"the backup has an invalid entry for {placeholder_path}")
+    return mapping
+
+def free_vault_path(filename, reserved):
+    base, ext = os.path.splitext(filename)
+    candidate = filename
+    counter = 1
+    while candidate in reserved or os.path.exists(os.path.join(PROTECTED_DIR, candidate)):
+        candidate = f"{base} (restored {counter}){ext}"
+        counter += 1
+    reserved.add(candidate)
+    return os.path.join(PROTECTED_DIR, candidate)
+
+def remove_placeholders(placeholder_paths):
+    for placeholder_path in placeholder_paths:
+        try:
+            os.remove(placeholder_path)
+        except OSError as e:
+            logging.error(f"Error removing placeholder {placeholder_path}: {e}")
+
+def restore_vault_entry(archive_path, offset, size, target_path):
+    with open(archive_path, "rb") as src, open(target_path, "wb") as dst:
+        src.seek(offset)
+        remaining = size
+        while remaining > 0:
+            chunk = src.read(min(EXPORT_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise EOFError(f"Backup ended early while restoring {os.path.basename(target_path)}")
+            dst.write(chunk)
+            remaining -= len(chunk)
+
+def import_vault_archive(path, protected_files, progress=None):
+    """Restore the entries of a backup archive into the vault.
+
+    Entries that are not locked right now get a new vault file and placeholder, unless
+    their original file exists again (unlocked after the backup). Entries that are
+    locked are replaced only when the archive holds a newer copy, so a full backup
+    followed by its incrementals restores the latest version of every file.
+    Files are staged first and only moved into the vault once the whole archive has
+    been read and every placeholder is in place. Returns (restored entries, skipped
+    file descriptions).
+    """
+    skipped = []
+    targets = {}
+    signatures = {}
+    entries = {}
+    reserved = set()
+    created_placeholders = []
+    staging_dir = os.path.join(DATA_DIR, IMPORT_STAGING_DIR)
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+    os.makedirs(staging_dir)
+    try:
+        tar, compressed = open_backup_archive(path)
+        staged = {}
+        jobs = []
+        with tar:
+            mapping = read_backup_mapping(tar)
+            for placeholder_path, entry in mapping.items():
+                original_name = os.path.basename(placeholder_path.replace(".locked", ""))
+                archive_name = entry["file"]
+                if placeholder_path in protected_files:
+                    protected_path = protected_files[placeholder_path]
+                    locked_mtime_ns = os.stat(protected_path).st_mtime_ns if os.path.exists(protected_path) else None
+                    if locked_mtime_ns is not None and locked_mtime_ns > entry["mtime_ns"]:
+                        skipped.append(f"{original_name} (a newer copy is already locked)")
+                        continue
+                    if locked_mtime_ns == entry["mtime_ns"]:
+                        continue
+                    target_path = protected_path
+                elif os.path.exists(placeholder_path.replace(".locked", "")):
+                    skipped.append(f"{original_name} (unlocked since the backup)")
+                    continue
+                else:
+                    target_path = None
+                if archive_name not in targets:
+                    targets[archive_name] = target_path or free_vault_path(os.path.basename(archive_name), reserved)
+                    signatures[archive_name] = entry["mtime_ns"]
+                entries[placeholder_path] = archive_name
+
+            while True:
+                member = tar.next()
+                if member is None:
+                    break
+                if not member.isfile() or not is_vault_member(member.name):
+                    logging.warning(f"Skipping unexpected backup entry: {member.name}")
+                    continue
+                if member.name not in targets:
+                    continue
+                staging_path = os.path.join(staging_dir, str(len(staged)))
+                staged[member.name] = staging_path
+                if compressed or member.issparse():
+                    if progress:
+                        progress(f"Restoring {len(staged)}/{len(targets)}: {os.path.basename(member.name)}")
+                    with tar.extractfile(member) as src, open(staging_path, "wb") as dst:
+                        shutil.copyfileobj(src, dst, EXPORT_CHUNK_SIZE)
+                else:
+                    jobs.append((member.offset_data, member.size, staging_path))
+
+        with ThreadPoolExecutor(max_workers=IMPORT_WORKERS) as pool:
+            futures = [pool.submit(restore_vault_entry, path, *job) for job in jobs]
+            for done_count, future in enumerate(as_completed(futures), 1):
+                future.result()
+                if progress:
+                    progress(f"Restoring {done_count}/{len(futures)} file(s)")
+
+        # Placeholders go in first, so a file is never moved into the vault without one
+        restored = {}
+        for placeholder_path, archive_name in entries.items():
+            original_name = os.path.basename(placeholder_path.replace(".locked", ""))
+            if archive_name not in staged:
+                skipped.append(f"{original_name} (not in this backup)")
+                continue
+            try:
+                if not os.path.exists(placeholder_path):
+                    with open(placeholder_path, "w") as f:
+                        f.write("Locked by OneLock. Use the app to unlock.")
+                    created_placeholders.append(placeholder_path)
+                    ctypes.windll.kernel32.SetFileAttributesW(placeholder_path, 2)
+            except Exception as e:
+                logging.error(f"Error restoring placeholder {placeholder_path}: {e}")
+                skipped.append(f"{original_name} (could not restore placeholder)")
+                continue
+            restored[placeholder_path] = targets[archive_name]
+
+        try:
+            ensure_protected_dir()
+        except Exception:
+            remove_placeholders(created_placeholders)
+            raise
+        for archive_name in dict.fromkeys(entries[placeholder_path] for placeholder_path in restored):
+            target_path = targets[archive_name]
+            try:
+                os.replace(staged[archive_name], target_path)
+            except Exception as e:
+                logging.error(f"Error moving {archive_name} into the vault: {e}")
+                failed = [placeholder_path for placeholder_path in restored if entries[placeholder_path] == archive_name]
+                for placeholder_path in failed:
+                    del restored[placeholder_path]
+                    skipped.append(f"{os.path.basename(placeholder_path.replace('.locked', ''))} (could not write to the vault)")
+                remove_placeholders([placeholder_path for placeholder_path in failed
+                                     if placeholder_path in created_placeholders])
+                continue
+            try:
+                # Keep the original mtime so a later import can tell which copy is newer
+                os.utime(target_path, ns=(signatures[archive_name], signatures[archive_name]))
+            except Exception as e:
+                logging.warning(f"Could not restore modification time of {target_path}: {e}")
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return restored, skipped
+
+def run_command_line(argv):
+    parser = argparse.ArgumentParser(prog="onelock",
+                                     description="Export or import OneLock backups without opening the window.")
+    actions = parser.add_mutually_exclusive_group(required=True)
+    actions.add_argument("--export", metavar="PATH",
+                         help="write a backup archive (.tar or .tar.gz) to PATH, or a timestamped .tar "
+                              "inside PATH if it is a directory")
+    actions.add_argument("--import", dest="import_path", metavar="PATH", help="restore the backup archive at PATH")
+    parser.add_argument("--incremental", action="store_true",
+                        help="with --export, only include files changed since the last export")
+    args = parser.parse_args(argv)
+    if args.incremental and not args.export:
+        parser.error("--incremental can only be used with --export")
+
+    if not os.path.exists(PIN_FILE):
+        print("OneLock has not been set up yet. Start the app to create a PIN.", file=sys.stderr)
+        return 1
+    try:
+        with open(PIN_FILE, "rb") as f:
+            pin = pickle.load(f)
+        protected_files = {}
+        if os.path.exists(PROTECTED_FILES_DB):
+            with open(PROTECTED_FILES_DB, "rb") as f:
+                protected_files = pickle.load(f)
+    except Exception as e:
+        logging.error(f"Error loading data: {e}")
+        print(f"Failed to load locker data: {e}", file=sys.stderr)
+        return 1
+
+    # Scheduled runs have no console to type into, so they pass the PIN in ONELOCK_PIN
+    entered_pin = os.environ.get("ONELOCK_PIN")
+    if entered_pin is None and sys.stdin is not None and sys.stdin.isatty():
+        entered_pin = getpass.getpass("OneLock PIN: ")
+    if entered_pin != pin:
+        logging.warning("Command line backup refused: incorrect PIN")
+        print("Incorrect PIN. Scheduled backups must set ONELOCK_PIN.", file=sys.stderr)
+        return 1
+
+    try:
+        if args.export:
+            incremental = args.incremental and bool(load_export_marker())
+            path, exported_count = export_vault_archive(args.export, protected_files, incremental, progress=print)
+            kind = "incremental" if incremental else "full"
+            logging.info(f"Exported {kind} backup with {exported_count} file(s) to {path}")
+            print(f"Exported {exported_count} file(s) to {kind} backup {path}")
+        else:
+            restored, skipped = import_vault_archive(args.import_path, protected_files, progress=print)
+            protected_files.update(restored)
+            with open(PROTECTED_FILES_DB, "wb") as f:
+                pickle.dump(protected_files, f)
+            logging.info(f"Imported {len(restored)} file(s) from {args.import_path}")
+            print(f"Imported {len(restored)} file(s) from {args.import_path}")
+            for description in skipped:
+                print(f"Skipped {description}")
+    except Exception as e:
+        logging.error(f"Command line backup failed: {e}")
+        print(f"Backup failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+class BackupWorker(QThread):
+    progress = pyqtSignal(str)
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, task, *args, parent=None):
+        super().__init__(parent)
+        self.task = task
+        self.args = args
+
+    def run(self):
+        try:
+            result = self.task(*self.args, progress=self.progress.emit)
+        except Exception as e:
+            logging.error(f"Backup task failed: {e}")
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(result)
+
 class LoginDialog(QDialog):
     def __init__(self, correct_pin, parent=None):
         super().__init__(parent)
@@ -187,6 +538,7 @@ class OneLock(QMainWindow):
         self.pending_files = []
         self.pin = None
         self.notification_label = None
+        self.backup_worker = None
         self.locked_list = QListWidget()
         icon_path = resource_path("lock.ico")
         if not os.path.exists(icon_path):
@@ -198,9 +550,7 @@ class OneLock(QMainWindow):
         self.clean_missing_files()
 
     def setup_protected_dir(self):
-        if not os.path.exists(PROTECTED_DIR):
-            os.makedirs(PROTECTED_DIR)
-            ctypes.windll.kernel32.SetFileAttributesW(PROTECTED_DIR, 2)
+        ensure_protected_dir()
 
     def setup_ui(self):
         self.setStyleSheet("""
@@ -423,6 +773,30 @@ class OneLock(QMainWindow):
         """)
         self.unlock_button.clicked.connect(self.unlock_selected_files)
 
+        self.export_button = QPushButton("Export Backup 📦")
+        self.export_button.setToolTip("Click to save your locked files to a backup archive.")
+        self.export_button.setFixedHeight(40)
+        self.export_button.setStyleSheet("""
+            QPushButton { background-color: #1e90ff; color: white; border-radius: 15px; font-family: Segoe UI; 
+                          font-size: 14px; padding: 8px; }
+            QPushButton:hover { background-color: #4682b4; }
+        """)
+        self.export_button.clicked.connect(self.export_vault)
+
+        self.import_button = QPushButton("Import Backup 📥")
+        self.import_button.setToolTip("Click to restore locked files from a backup archive.")
+        self.import_button.setFixedHeight(40)
+        self.import_button.setStyleSheet("""
+            QPushButton { background-color: #1e90ff; color: white; border-radius: 15px; font-family: Segoe UI; 
+                          font-size: 14px; padding: 8px; }
+            QPushButton:hover { background-color: #4682b4; }
+        """)
+        self.import_button.clicked.connect(self.import_vault)
+
+        backup_layout = QHBoxLayout()
+        backup_layout.addWidget(self.export_button)
+        backup_layout.addWidget(self.import_button)
+
         layout.addWidget(self.title_label)
         layout.addWidget(self.instruction_label)
         layout.addWidget(self.notification_label)
@@ -431,6 +805,7 @@ class OneLock(QMainWindow):
         layout.addWidget(self.locked_list)
         layout.addWidget(self.choose_button)
         layout.addWidget(self.unlock_button, alignment=Qt.AlignCenter)
+        layout.addLayout(backup_layout)
 
         self.opacity_effect = QPropertyAnimation(self.central_widget, b"windowOpacity")
         self.opacity_effect.setDuration(300)
@@ -498,6 +873,9 @@ class OneLock(QMainWindow):
                 if os.path.exists(PROTECTED_DIR):
                     shutil.rmtree(PROTECTED_DIR)
                     logging.info("Deleted protected files directory: .protected_files")
+                if os.path.exists(EXPORT_MARKER_FILE):
+                    os.remove(EXPORT_MARKER_FILE)
+                    logging.info("Deleted export marker: export_marker.pkl")
                 self.protected_files = {}
                 self.pending_files = []
                 self.pin = None
@@ -607,6 +985,84 @@ class OneLock(QMainWindow):
         else:
             self.status_label.setText("Unlock canceled - incorrect PIN")
 
+    def export_vault(self):
+        dialog = UnlockDialog("your vault for export", self.pin, self)
+        if dialog.exec_() != QDialog.Accepted:
+            self.status_label.setText("Export canceled - incorrect PIN")
+            return
+
+        incremental = False
+        if load_export_marker():
+            reply = QMessageBox.question(self, "Export Backup",
+                                         "Export only files changed since the last backup?\nChoose No for a full backup.",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            incremental = reply == QMessageBox.Yes
+
+        # Uncompressed backups are the default because they restore in parallel
+        path, _ = QFileDialog.getSaveFileName(self, "Export Vault Backup", backup_file_name(incremental),
+                                              "Uncompressed Backup (*.tar);;Compressed Backup (*.tar.gz)")
+        if not path:
+            return
+
+        self.start_backup_worker("export", lambda result: self.finish_export(incremental, result),
+                                 export_vault_archive, path, dict(self.protected_files), incremental)
+
+    def finish_export(self, incremental, result):
+        self.set_backup_controls_enabled(True)
+        path, exported_count = result
+        kind = "incremental" if incremental else "full"
+        logging.info(f"Exported {kind} backup with {exported_count} file(s) to {path}")
+        self.status_label.setText(f"Exported {exported_count} file(s) to {kind} backup successfully!")
+
+    def import_vault(self):
+        dialog = UnlockDialog("your vault for import", self.pin, self)
+        if dialog.exec_() != QDialog.Accepted:
+            self.status_label.setText("Import canceled - incorrect PIN")
+            return
+
+        path, _ = QFileDialog.getOpenFileName(self, "Import Vault Backup", "", "OneLock Backup (*.tar *.tar.gz)")
+        if not path:
+            return
+
+        self.setup_protected_dir()
+        self.start_backup_worker("import", lambda result: self.finish_import(path, result),
+                                 import_vault_archive, path, dict(self.protected_files))
+
+    def finish_import(self, path, result):
+        self.set_backup_controls_enabled(True)
+        restored, skipped = result
+        self.protected_files.update(restored)
+        self.save_protected_files()
+        self.update_locked_list()
+        logging.info(f"Imported {len(restored)} file(s) from {path}")
+        self.status_label.setText(f"Imported {len(restored)} file(s) successfully!")
+        if skipped:
+            QMessageBox.information(self, "Import Backup",
+                                    f"Skipped {len(skipped)} file(s):\n" + "\n".join(skipped[:20]))
+
+    def start_backup_worker(self, action, on_success, task, *args):
+        self.set_backup_controls_enabled(False)
+        self.backup_worker = BackupWorker(task, *args, parent=self)
+        self.backup_worker.progress.connect(self.status_label.setText)
+        self.backup_worker.succeeded.connect(on_success)
+        self.backup_worker.failed.connect(lambda error: self.backup_failed(action, error))
+        self.backup_worker.start()
+
+    def backup_failed(self, action, error):
+        self.set_backup_controls_enabled(True)
+        self.status_label.setText(f"Backup {action} failed")
+        if action == "export":
+            error += "\nNo backup file was written."
+        else:
+            error += "\nNo files were restored."
+        QMessageBox.critical(self, "Error", f"Failed to {action} backup: {error}")
+
+    def set_backup_controls_enabled(self, enabled):
+        # Locking or unlocking while a backup runs would change the vault under it
+        self.setAcceptDrops(enabled)
+        for button in (self.choose_button, self.unlock_button, self.export_button, self.import_button):
+            button.setEnabled(enabled)
+
     def load_data(self):
         try:
             if os.path.exists(PIN_FILE):
@@ -628,6 +1084,9 @@ class OneLock(QMainWindow):
             QMessageBox.critical(self, "Error", "Failed to save locker data!")
 
     def closeEvent(self, event):
+        # Let a running backup finish so it does not leave a partial archive behind
+        if self.backup_worker is not None and self.backup_worker.isRunning():
+            self.backup_worker.wait()
         # Save protected files before exiting
         self.save_protected_files()
         logging.info("Application closed. Protected files saved.")
@@ -641,6 +1100,10 @@ class OneLock(QMainWindow):
         QApplication.quit()
 
 if __name__ == "__main__":
+    # Only backup commands skip the window; other arguments are ignored as before
+    if any(arg.split("=")[0] in ("--export", "--import") for arg in sys.argv[1:]):
+        sys.exit(run_command_line(sys.argv[1:]))
+
     app = QApplication(sys.argv)
     
     # Show splash screen with resource path